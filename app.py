@@ -2,13 +2,34 @@
 import os
 import time
 import logging
+import sqlite3
+import queue
+import atexit
+import threading
+import functools
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, make_response, g
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 import warnings
-from datetime import timedelta   # ← make sure this import exists at the top
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; Flask's stdlib-json provider is used without it
+    orjson = None
+
+try:
+    from celery import Celery
+except ImportError:  # Celery is optional; SMS is sent inline without it
+    Celery = None
 
 load_dotenv()
 
@@ -19,16 +40,73 @@ TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 YOUR_PHONE_NUMBER = os.getenv("YOUR_PHONE_NUMBER")
 ALERT_COOLDOWN_SECONDS = int(os.getenv("ALERT_COOLDOWN_SECONDS", "60"))
+REDIS_URL = os.getenv("REDIS_URL")
+SMS_QUEUE = "twilio_queue"
+BIN_NAMES = ("yellow", "green", "blue")
+VALID_BINS = frozenset(BIN_NAMES)
+# SMS text per bin, built once; only the level is filled in per send
+BODY_TEMPLATES = {name: f"Alert: {name.capitalize()} Bin is {{level}}% full. Please empty it soon." for name in BIN_NAMES}
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+READING_FLUSH_MAX_ROWS = int(os.getenv("READING_FLUSH_MAX_ROWS", "500"))
+READING_FLUSH_INTERVAL_MS = int(os.getenv("READING_FLUSH_INTERVAL_MS", "200"))
+LEVELS_CACHE_TTL = int(os.getenv("LEVELS_CACHE_TTL", "1"))
 
 # Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("smart-bin")
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (same sorted-key output, much faster dumps)."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # Flask + SQLAlchemy
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DATABASE_FILE}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    # connections are pooled and handed between request threads; the busy
+    # timeout is set by the SQLITE_BUSY_TIMEOUT_MS pragma below
+    "connect_args": {"check_same_thread": False},
+    "poolclass": QueuePool,
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
 db = SQLAlchemy(app)
+# per-process cache; /levels entries are keyed by the shared levels version
+cache = Cache(app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": LEVELS_CACHE_TTL})
+
+# Celery (only when a broker is configured). SMS tasks go to their own queue so
+# Twilio round-trips never compete with DB work:
+#   celery -A app.celery worker -Q twilio_queue
+celery = None
+if Celery is not None and REDIS_URL:
+    celery = Celery("smartbin", broker=REDIS_URL)
+    celery.conf.task_routes = {"smartbin.send_sms": {"queue": SMS_QUEUE}}
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; applied once per pooled connection."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cur = dbapi_connection.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA cache_size=-65536")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.close()
 
 # ---------- MODELS ----------
 class Bin(db.Model):
@@ -46,6 +124,10 @@ class Reading(db.Model):
     level = db.Column(db.Integer, nullable=False)
     ts = db.Column(db.DateTime, default=datetime.utcnow)
 
+# newest-first scans for /readings/<bin> (per bin) and /history (all bins)
+ix_readings_bin_ts = db.Index("ix_readings_bin_ts", Reading.bin_name, Reading.ts.desc())
+ix_readings_ts = db.Index("ix_readings_ts", Reading.ts.desc())
+
 # Feature 3: Settings table (simulator pause)
 class Setting(db.Model):
     __tablename__ = "settings"
@@ -61,51 +143,340 @@ class ActionLog(db.Model):
     detail = db.Column(db.String(512), nullable=True)
     ts = db.Column(db.DateTime, default=datetime.utcnow)
 
+ix_actionlogs_ts = db.Index("ix_actionlogs_ts", ActionLog.ts.desc())
+
+# Change counters for the mutable resources (levels, config), bumped in the same
+# commit as the data so every worker process sees the same version
+class DataVersion(db.Model):
+    __tablename__ = "data_versions"
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 # ---------- HELPERS ----------
+def _build_twilio_client():
+    """One client per process so the HTTPS connection to api.twilio.com stays warm."""
+    if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN]):
+        return None
+    http_client = TwilioHttpClient(pool_connections=True)
+    http_client.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=http_client)
+
+_twilio_client = _build_twilio_client()
+
 def safe_send_sms(bin_name, level):
     """Safe Twilio wrapper; never raises if creds missing."""
-    if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, YOUR_PHONE_NUMBER]):
+    if _twilio_client is None or not all([TWILIO_PHONE_NUMBER, YOUR_PHONE_NUMBER]):
         logger.warning("Twilio not configured; skipping SMS send.")
         return {"sent": False, "error": "twilio_not_configured"}
 
     try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        body = f"Alert: {bin_name.capitalize()} Bin is {level}% full. Please empty it soon."
-        message = client.messages.create(body=body, from_=TWILIO_PHONE_NUMBER, to=YOUR_PHONE_NUMBER)
+        body = BODY_TEMPLATES[bin_name].format(level=level)
+        message = _twilio_client.messages.create(body=body, from_=TWILIO_PHONE_NUMBER, to=YOUR_PHONE_NUMBER)
         logger.info("SMS sent SID=%s", message.sid)
         return {"sent": True, "sid": message.sid}
     except Exception as e:
         logger.exception("Failed to send SMS")
         return {"sent": False, "error": str(e)}
 
+def record_alert(bin_name, level, kind, res):
+    """Store the outcome of an SMS attempt; `kind` is "auto" or "manual"."""
+    if res.get("sent"):
+        b = get_bin(bin_name)
+        if b:
+            b.last_alert_ts = time.time()  # committed together with the action log
+        log_action(f"{kind}_alert_sent", f"{bin_name} level={level} sid={res.get('sid')}")
+    else:
+        if kind == "auto":
+            # release the claim_alert cooldown so the next reading retries the alert
+            db.session.execute(Bin.__table__.update().where(Bin.name == bin_name).values(last_alert_ts=0.0))
+        log_action(f"{kind}_alert_failed", f"{bin_name} level={level} error={res.get('error')}")
+
+if celery is not None:
+    @celery.task(bind=True, name="smartbin.send_sms", max_retries=3, default_retry_delay=5)
+    def send_sms_task(self, bin_name, level, kind="auto"):
+        res = safe_send_sms(bin_name, level)
+        retryable = res.get("error") != "twilio_not_configured"
+        if not res.get("sent") and retryable and self.request.retries < self.max_retries:
+            raise self.retry()
+        with app.app_context():
+            record_alert(bin_name, level, kind, res)
+        return res
+
+# Readings are buffered here and written in batches by a background thread,
+# so /update_level never waits on the INSERT.
+_reading_buf = queue.Queue()
+_reading_writer = None
+_reading_writer_lock = threading.Lock()
+_reading_flush_lock = threading.Lock()  # held while a batch is in flight
+
+def _write_readings(rows, attempts=3):
+    """Insert `rows` in one transaction, retrying with backoff; returns whether they were written."""
+    for attempt in range(attempts):
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(Reading.__table__.insert(), [
+                    {"bin_name": bin_name, "level": level, "ts": ts} for bin_name, level, ts in rows
+                ])
+            return True
+        except Exception:
+            logger.exception("Failed to write %d buffered readings (attempt %d/%d)", len(rows), attempt + 1, attempts)
+            if attempt + 1 < attempts:
+                time.sleep(0.5 * 2 ** attempt)
+    return False
+
+def _reading_writer_loop():
+    """Flush every READING_FLUSH_MAX_ROWS rows or READING_FLUSH_INTERVAL_MS, whichever comes first."""
+    wait = READING_FLUSH_INTERVAL_MS / 1000.0
+    with app.app_context():
+        while True:
+            # take rows off the queue only while holding the lock, so flush_readings
+            # never runs while a row is neither queued nor written
+            with _reading_flush_lock:
+                try:
+                    rows = [_reading_buf.get(timeout=wait)]
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + wait
+                while len(rows) < READING_FLUSH_MAX_ROWS:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        rows.append(_reading_buf.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                written = _write_readings(rows)
+                if not written:
+                    # keep them for the next batch rather than dropping acknowledged readings
+                    for row in rows:
+                        _reading_buf.put(row)
+            if not written:
+                time.sleep(wait)
+
+def enqueue_reading(bin_name, level):
+    """Queue a reading for the background writer (started lazily, so it survives forking)."""
+    global _reading_writer
+    _reading_buf.put((bin_name, level, datetime.utcnow()))
+    if _reading_writer is None or not _reading_writer.is_alive():
+        with _reading_writer_lock:
+            if _reading_writer is None or not _reading_writer.is_alive():
+                _reading_writer = threading.Thread(target=_reading_writer_loop, name="reading-writer", daemon=True)
+                _reading_writer.start()
+
+@atexit.register
+def flush_readings():
+    """Wait for the in-flight batch and write whatever is still buffered (called on shutdown)."""
+    with _reading_flush_lock:
+        rows = []
+        while True:
+            try:
+                rows.append(_reading_buf.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            with app.app_context():
+                if not _write_readings(rows):
+                    logger.error("Dropping %d buffered readings at shutdown", len(rows))
+
+# name -> Bin.id; bins are fixed, so request paths only need a primary-key lookup
+BIN_IDS = {}
+
+VERSIONED_RESOURCES = ("levels", "config")
+
 def init_bins_if_needed():
     """Create default bins (idempotent)."""
-    for name in ["yellow", "green", "blue"]:
+    for name in BIN_NAMES:
         if not Bin.query.filter_by(name=name).first():
             db.session.add(Bin(name=name))
     db.session.commit()
+    BIN_IDS.update({b.name: b.id for b in Bin.query.all()})
+
+def get_bin(name):
+    """Return the Bin called `name` (or None), using the cached id when we have it."""
+    bin_id = BIN_IDS.get(name)
+    if bin_id is not None:
+        b = db.session.get(Bin, bin_id)
+        if b:
+            return b
+    b = Bin.query.filter_by(name=name).first()
+    if b:
+        BIN_IDS[name] = b.id
+    return b
+
+def init_versions_if_needed():
+    """Create the data_versions rows (idempotent)."""
+    for name in VERSIONED_RESOURCES:
+        if not db.session.get(DataVersion, name):
+            db.session.add(DataVersion(name=name, version=0))
+    db.session.commit()
+
+def bump_version(name):
+    """Stage a version bump for resource `name` (caller commits it with the data)."""
+    db.session.execute(
+        DataVersion.__table__.update()
+        .where(DataVersion.name == name)
+        .values(version=DataVersion.version + 1)
+    )
+    g.pop("data_versions", None)
+
+def get_version(name):
+    """Current version of resource `name`, read once per request."""
+    versions = g.setdefault("data_versions", {})
+    if name not in versions:
+        stmt = select(DataVersion.version).where(DataVersion.name == name)
+        versions[name] = db.session.execute(stmt).scalar() or 0
+    return versions[name]
+
+def current_etag(name):
+    """Version tag for resource `name`.
+
+    readings/actions are append-only (and written from the reading writer and Celery
+    workers too), so their newest id is the version. levels/config are versioned in
+    the data_versions table. Either way every worker process agrees on the tag.
+    """
+    if name == "readings":
+        return f"readings-{db.session.query(func.max(Reading.id)).scalar() or 0}"
+    if name == "actions":
+        return f"actions-{db.session.query(func.max(ActionLog.id)).scalar() or 0}"
+    return f"{name}-{get_version(name)}"
+
+def etag_versioned(name):
+    """Tag GET responses with the `name` version and answer 304 when the client's copy is current."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # read the version before the view runs: a concurrent write can only make the tag older
+            etag = current_etag(name)
+            if request.if_none_match.contains_weak(etag):
+                resp = app.response_class(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag, weak=True)
+            return resp
+        return wrapper
+    return decorator
+
+def parse_level(value):
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+def set_bin_level(bin_color, level):
+    """Stage the new level for `bin_color` in the session (caller commits); returns the Bin."""
+    b = get_bin(bin_color)
+    if not b:
+        b = Bin(name=bin_color, latest_level=level)
+        db.session.add(b)
+    b.latest_level = level
+    return b
+
+def claim_alert(b, level):
+    """Claim the alert cooldown for `b` if `level` should alert (caller commits); returns whether to alert."""
+    # basic alert logic (keeps previous behaviour — 80% hardcoded here; change if needed)
+    if level < 80:
+        return False
+    if b.id is None:
+        db.session.flush()
+    now_ts = time.time()
+    # Conditional UPDATE: the cooldown check and the claim happen in one statement under
+    # SQLite's write lock, so of two concurrent requests only one sees rowcount == 1.
+    result = db.session.execute(
+        Bin.__table__.update()
+        .where(Bin.id == b.id, func.coalesce(Bin.last_alert_ts, 0) <= now_ts - ALERT_COOLDOWN_SECONDS)
+        .values(last_alert_ts=now_ts)
+    )
+    return result.rowcount == 1
+
+def send_auto_alert(bin_name, level):
+    """Send (or queue) the alert claimed by claim_alert; returns (alert_sent, alert_queued)."""
+    if celery is not None:
+        try:
+            send_sms_task.delay(bin_name, level, "auto")
+        except Exception as e:
+            logger.exception("Failed to queue SMS task")
+            record_alert(bin_name, level, "auto", {"sent": False, "error": f"queue_failed: {e}"})
+            return False, False
+        return False, True
+    res = safe_send_sms(bin_name, level)
+    record_alert(bin_name, level, "auto", res)
+    return bool(res.get("sent")), False
+
+def create_indexes():
+    """create_all() skips tables that already exist, so add missing indexes to older DBs here."""
+    for index in (ix_readings_bin_ts, ix_readings_ts, ix_actionlogs_ts):
+        index.create(db.engine, checkfirst=True)
+
+def init_db():
+    """Create tables, indexes and default bins (idempotent); needs an app context."""
+    db.create_all()
+    create_indexes()
+    init_bins_if_needed()
+    init_versions_if_needed()
+
+def warm_up():
+    """Open a pooled DB connection and the HTTPS connection to Twilio before the first request."""
+    with db.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    if _twilio_client is not None:
+        try:
+            _twilio_client.http_client.session.head("https://api.twilio.com", timeout=5)
+        except Exception:
+            logger.warning("Could not pre-connect to api.twilio.com", exc_info=True)
+
+# key -> value (None when the row doesn't exist), valid while the shared "config"
+# version equals _settings_cache_version; any worker's set_setting bumps that version
+_SETTINGS_CACHE = {}
+_settings_cache_version = None
+_settings_lock = threading.Lock()
+_MISSING = object()
 
 def get_setting(key, default=None):
-    s = Setting.query.filter_by(key=key).first()
-    return s.value if s else default
+    global _settings_cache_version
+    version = get_version("config")
+    with _settings_lock:
+        if _settings_cache_version is None or version > _settings_cache_version:
+            _SETTINGS_CACHE.clear()
+            _settings_cache_version = version
+        value = _SETTINGS_CACHE.get(key, _MISSING) if version == _settings_cache_version else _MISSING
+    if value is _MISSING:
+        s = Setting.query.filter_by(key=key).first()
+        value = s.value if s else None
+        with _settings_lock:
+            # a newer version may have landed while we queried; only fill for ours
+            if version == _settings_cache_version and key not in _SETTINGS_CACHE:
+                _SETTINGS_CACHE[key] = value
+    return value if value is not None else default
 
 def set_setting(key, value):
+    global _settings_cache_version
     s = Setting.query.filter_by(key=key).first()
     if not s:
         s = Setting(key=key, value=str(value))
         db.session.add(s)
     else:
         s.value = str(value)
+    bump_version("config")
     db.session.commit()
+    with _settings_lock:
+        # the next get_setting re-reads under the bumped version
+        _SETTINGS_CACHE.clear()
+        _settings_cache_version = None
 
 def log_action(action_type, detail=None):
     try:
-        db.session.add(ActionLog(action_type=action_type, detail=detail))
+        # Core insert: the row is never read back as an object, so skip unit-of-work tracking
+        db.session.execute(ActionLog.__table__.insert(), {"action_type": action_type, "detail": detail})
         db.session.commit()
         logger.info("Action logged: %s %s", action_type, detail)
     except Exception:
         logger.exception("Failed to log action")
 
+# readings.ts formatted in IST by SQLite itself (no per-row timedelta/strftime in Python)
+IST_TS = func.strftime("%Y-%m-%d %H:%M:%S", Reading.ts, "+5 hours", "+30 minutes")
+
 # ---------- ROUTES ----------
 @app.route("/")
 def home():
@@ -113,83 +484,93 @@ def home():
 
 
 @app.route('/history')
+@etag_versioned("readings")
 def history_page():
-    # Fetch last 200 readings from DB
-    readings = Reading.query.order_by(Reading.ts.desc()).limit(200).all()
-
-    # Convert UTC → IST inside Python
-    readings_for_template = []
-    for r in readings:
-        ist_ts = (r.ts + timedelta(hours=5, minutes=30))
-        readings_for_template.append({
-            "bin_name": r.bin_name,
-            "level": r.level,
-            "ts_ist": ist_ts.strftime("%Y-%m-%d %H:%M:%S")
-        })
-
-    return render_template("history.html", readings=readings_for_template)
+    # Fetch last 200 readings from DB, already converted UTC → IST
+    stmt = (select(Reading.bin_name, Reading.level, IST_TS.label("ts_ist"))
+            .order_by(Reading.ts.desc())
+            .limit(200))
+    readings = db.session.execute(stmt).all()
+    return render_template("history.html", readings=readings)
 
 
 @app.route("/levels", methods=["GET"])
+@etag_versioned("levels")
+@cache.cached(timeout=LEVELS_CACHE_TTL, key_prefix=lambda: f"levels-{get_version('levels')}")
 def get_levels():
     bins = Bin.query.all()
     return jsonify({b.name: b.latest_level for b in bins})
 
 @app.route("/update_level/<bin_color>", methods=["POST"])
 def update_level(bin_color):
-    if bin_color not in ["yellow", "green", "blue"]:
+    if bin_color not in VALID_BINS:
         return jsonify({"error": "invalid bin"}), 400
 
     data = request.get_json(force=True, silent=True) or {}
     level = data.get("level")
     if level is None:
         level = data.get("value") or 0
-    try:
-        level = int(level)
-    except Exception:
-        level = 0
+    level = parse_level(level)
 
-    b = Bin.query.filter_by(name=bin_color).first()
-    if not b:
-        b = Bin(name=bin_color, latest_level=level)
-        db.session.add(b)
-
-    b.latest_level = level
-    db.session.add(Reading(bin_name=bin_color, level=level))
+    b = set_bin_level(bin_color, level)
+    alert_due = claim_alert(b, level)
+    bump_version("levels")
     db.session.commit()
+    enqueue_reading(bin_color, level)
 
-    # basic alert logic (keeps previous behaviour — 80% hardcoded here; change if needed)
-    alert_sent = False
-    if level >= 80:
-        now_ts = time.time()
-        if now_ts - (b.last_alert_ts or 0) >= ALERT_COOLDOWN_SECONDS:
-            res = safe_send_sms(bin_color, level)
-            if res.get("sent"):
-                b.last_alert_ts = now_ts
-                db.session.commit()
-                alert_sent = True
-                log_action("auto_alert_sent", f"{bin_color} level={level} sid={res.get('sid')}")
-            else:
-                log_action("auto_alert_failed", f"{bin_color} level={level} error={res.get('error')}")
+    alert_sent, alert_queued = False, False
+    if alert_due:
+        alert_sent, alert_queued = send_auto_alert(bin_color, level)
 
     return jsonify({
         "status": "success",
         "bin": bin_color,
         "level": level,
-        "alert_sent": alert_sent
+        "alert_sent": alert_sent,
+        "alert_queued": alert_queued
     })
 
+@app.route("/update_levels", methods=["POST"])
+def update_levels():
+    """Batch form of /update_level: {"yellow": 42, "green": 13, ...}, one commit for all bins."""
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict) or not data:
+        return jsonify({"error": "expected an object of bin levels"}), 400
+    invalid = [name for name in data if name not in VALID_BINS]
+    if invalid:
+        return jsonify({"error": "invalid bin", "bins": invalid}), 400
+
+    levels = {name: parse_level(value) for name, value in data.items()}
+    alerts_due = {name: claim_alert(set_bin_level(name, level), level) for name, level in levels.items()}
+    bump_version("levels")
+    db.session.commit()
+
+    results = {}
+    for name, level in levels.items():
+        enqueue_reading(name, level)
+        alert_sent, alert_queued = False, False
+        if alerts_due[name]:
+            alert_sent, alert_queued = send_auto_alert(name, level)
+        results[name] = {"level": level, "alert_sent": alert_sent, "alert_queued": alert_queued}
+    return jsonify({"status": "success", "bins": results})
+
 @app.route("/readings/<bin_color>", methods=["GET"])
+@etag_versioned("readings")
 def readings(bin_color):
-    if bin_color not in ["yellow", "green", "blue"]:
+    if bin_color not in VALID_BINS:
         return jsonify({"error": "invalid bin"}), 400
     last_n = int(request.args.get("n", 100))
-    q = Reading.query.filter_by(bin_name=bin_color).order_by(Reading.ts.desc()).limit(last_n).all()
-    out = [{"level": r.level, "ts": r.ts.isoformat()} for r in reversed(q)]
+    stmt = (select(Reading.level, Reading.ts)
+            .where(Reading.bin_name == bin_color)
+            .order_by(Reading.ts.desc())
+            .limit(last_n))
+    rows = db.session.execute(stmt).all()
+    out = [{"level": level, "ts": ts.isoformat()} for level, ts in reversed(rows)]
     return jsonify(out)
 
 # ---------- CONFIG (Feature 3) ----------
 @app.route("/config", methods=["GET"])
+@etag_versioned("config")
 def get_config():
     simulator_paused = get_setting("simulator_paused", "false") == "true"
     return jsonify({"simulator_paused": simulator_paused})
@@ -207,34 +588,42 @@ def patch_config():
 
 # ---------- ACTIONS (Feature 4) ----------
 @app.route("/actions", methods=["GET"])
+@etag_versioned("actions")
 def get_actions():
     limit = int(request.args.get("n", 50))
-    acts = ActionLog.query.order_by(ActionLog.ts.desc()).limit(limit).all()
-    out = [{"action": a.action_type, "detail": a.detail, "ts": a.ts.isoformat()} for a in acts]
+    stmt = (select(ActionLog.action_type, ActionLog.detail, ActionLog.ts)
+            .order_by(ActionLog.ts.desc())
+            .limit(limit))
+    rows = db.session.execute(stmt).all()
+    out = [{"action": action, "detail": detail, "ts": ts.isoformat()} for action, detail, ts in rows]
     return jsonify(out)
 
 @app.route("/trigger_alert/<bin_color>", methods=["POST"])
 def trigger_alert(bin_color):
-    if bin_color not in ["yellow", "green", "blue"]:
+    if bin_color not in VALID_BINS:
         return jsonify({"error": "invalid bin"}), 400
-    b = Bin.query.filter_by(name=bin_color).first()
+    b = get_bin(bin_color)
     if not b:
         return jsonify({"error": "bin not found"}), 404
+    if celery is not None:
+        try:
+            send_sms_task.delay(bin_color, b.latest_level, "manual")
+        except Exception as e:
+            logger.exception("Failed to queue SMS task")
+            log_action("manual_alert_failed", f"{bin_color} level={b.latest_level} error=queue_failed: {e}")
+            return jsonify({"status": "alert_failed", "error": "queue_failed"}), 503
+        return jsonify({"status": "alert_queued"}), 202
     res = safe_send_sms(bin_color, b.latest_level)
+    record_alert(bin_color, b.latest_level, "manual", res)
     if res.get("sent"):
-        b.last_alert_ts = time.time()
-        db.session.commit()
-        log_action("manual_alert_sent", f"{bin_color} level={b.latest_level} sid={res.get('sid')}")
         return jsonify({"status": "alert_sent", "sid": res.get("sid")})
     else:
-        log_action("manual_alert_failed", f"{bin_color} level={b.latest_level} error={res.get('error')}")
         return jsonify({"status": "alert_failed", "error": res.get("error")}), 500
 
 # ---------- CLI helper ----------
 @app.cli.command("initdb")
 def initdb():
-    db.create_all()
-    init_bins_if_needed()
+    init_db()
     print("DB initialized and bins created (if not existing).")
 
 # ---------- RUN ----------
@@ -242,6 +631,7 @@ if __name__ == "__main__":
     warnings.filterwarnings("ignore")
     with app.app_context():
         # create tables safely (idempotent)
-        db.create_all()
-        init_bins_if_needed()
+        init_db()
+        warm_up()
+    # development server only; in production run: gunicorn -c gunicorn_conf.py app:app
     app.run(host="0.0.0.0", port=5000, debug=False, use_reloader=False)
@@ -0,0 +1,46 @@
+# gunicorn_conf.py — production server settings
+#   gunicorn -c gunicorn_conf.py app:app
+import os
+
+# preload_app imports the app in the master, so gevent has to patch the
+# stdlib before that import rather than in each worker
+from gevent import monkey
+monkey.patch_all()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# gevent lets one worker serve the dashboard pollers and the simulator
+# concurrently instead of one request at a time.
+# The in-process caches (/levels body, settings behind /config) and the ETags
+# are checked against the shared data_versions table, so extra workers never
+# serve another worker's stale data.
+workers = int(os.getenv("GUNICORN_WORKERS", max(2, os.cpu_count() or 1)))
+worker_class = "gevent"
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+keepalive = 5
+
+# import the app (models, metadata, Twilio client) once in the master and
+# fork workers from it
+preload_app = True
+
+
+def on_starting(server):
+    # create tables/indexes/bins once, before any worker exists
+    from app import app, db, init_db
+    with app.app_context():
+        init_db()
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    # never share the master's SQLite connections with a worker
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # open this worker's DB and Twilio connections before it accepts requests
+    from app import app, warm_up
+    with app.app_context():
+        warm_up()
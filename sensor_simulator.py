@@ -1,11 +1,19 @@
 import time
-import random
+import heapq
+import numpy as np
 import requests
 import sys
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-API_BASE = 'http://127.0.0.1:5000/update_level'
+API_BASE_BATCH = 'http://127.0.0.1:5000/update_levels'
 CONFIG_URL = 'http://127.0.0.1:5000/config'
 
+# One keep-alive session for all calls to the backend (no TCP handshake per POST)
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=4,
+                                     max_retries=Retry(total=2, backoff_factor=0.2)))
+
 # Per-bin update intervals (seconds) — change for faster / slower demo
 bins = {
     'yellow': {'interval': 6,  'next_update': time.time()},
@@ -16,10 +24,14 @@ bins = {
 CONFIG_POLL_INTERVAL = 5.0   # seconds between /config requests
 _last_config_check = 0.0
 _paused = False
+_config_etag = None   # ETag of the last /config we saw; lets the server answer 304
 
-# State
-last_levels = {name: None for name in bins.keys()}
-full_counts = {name: 0 for name in bins.keys()}  # how many consecutive updates at >=90
+# State, one slot per bin (position in BIN_NAMES)
+BIN_NAMES = list(bins.keys())
+BIN_INDEX = {name: i for i, name in enumerate(BIN_NAMES)}
+last_levels = np.full(len(BIN_NAMES), -1)   # -1 = no reading yet
+full_counts = np.zeros(len(BIN_NAMES), dtype=int)  # how many consecutive updates at >=90
+rng = np.random.default_rng()
 
 # Tweakable probabilities / params
 P_BIG_JUMP = 0.12      # chance of a big jump (fast fill)
@@ -32,9 +44,10 @@ def debug(msg):
     # Print to stderr so server console isn't mixed; optional
     print(msg, file=sys.stderr)
 
-def generate_next_level(name):
+def generate_next_levels(names):
     """
-    Returns next level for bin `name` (int 0..100), updates last_levels and full_counts.
+    Returns {name: next level (int 0..100)} for the bins in `names`, updates last_levels and full_counts.
+    All bins are stepped together with a fixed number of RNG draws per tick.
     Behavior:
       - seed first value 10..35
       - most updates: small positive change (1..8)
@@ -43,72 +56,58 @@ def generate_next_level(name):
       - If level >= 90 => increment full_counts and consider emptying
       - Small chance OCCASIONAL_EMPTY_PROB to empty to simulate manual emptying
     """
-    prev = last_levels.get(name)
-    if prev is None:
-        new = random.randint(10, 35)
-        last_levels[name] = new
-        full_counts[name] = 1 if new >= 90 else 0
-        return new
-
-    # If already very high, increase chance of emptying
-    will_empty = False
-    if prev >= 90:
-        full_counts[name] += 1
-        # base chance rises with how long it has been full
-        empty_chance = P_EMPTY_WHEN_FULL + 0.15 * max(0, full_counts[name] - FULL_COUNT_BEFORE_EMPTY)
-        if random.random() < empty_chance:
-            will_empty = True
-    else:
-        full_counts[name] = 0
-        # tiny chance to empty spontaneously
-        if random.random() < OCCASIONAL_EMPTY_PROB:
-            will_empty = True
-
-    if will_empty:
-        # empty to a small random level after collection
-        new = random.randint(0, 18)
-        last_levels[name] = new
-        full_counts[name] = 0
-        return new
-
-    # otherwise decide event
-    r = random.random()
-    if r < P_BIG_JUMP:
-        # big jump
-        delta = random.randint(10, 30)
-    elif r < P_BIG_JUMP + P_SMALL_DECREASE:
-        # small decrease (settling/compaction)
-        delta = -random.randint(2, 8)
-    else:
-        # gentle growth
-        delta = random.randint(1, 8)
-
-    new = prev + delta
-    new = max(0, min(100, int(new)))
+    idx = np.array([BIN_INDEX[name] for name in names])
+    k = len(idx)
+    prev = last_levels[idx]
+    seeding = prev < 0
+
+    # If already very high, increase chance of emptying (chance rises with how long it has been full);
+    # otherwise only a tiny chance to empty spontaneously
+    was_full = prev >= 90
+    counts = np.where(was_full, full_counts[idx] + 1, 0)
+    empty_chance = np.where(was_full,
+                            P_EMPTY_WHEN_FULL + 0.15 * np.maximum(0, counts - FULL_COUNT_BEFORE_EMPTY),
+                            OCCASIONAL_EMPTY_PROB)
+    will_empty = rng.random(k) < empty_chance
+
+    # otherwise decide event: big jump / small decrease (settling/compaction) / gentle growth
+    r = rng.random(k)
+    delta = np.select(
+        [r < P_BIG_JUMP, r < P_BIG_JUMP + P_SMALL_DECREASE],
+        [rng.integers(10, 31, k), -rng.integers(2, 9, k)],
+        rng.integers(1, 9, k),
+    )
+    grown = np.clip(prev + delta, 0, 100)
+
+    seed = rng.integers(10, 36, k)
+    emptied = rng.integers(0, 19, k)   # empty to a small random level after collection
+    new = np.where(seeding, seed, np.where(will_empty, emptied, grown))
 
     # update last_levels and full count
-    last_levels[name] = new
-    if new >= 90:
-        full_counts[name] += 1
-    else:
-        full_counts[name] = 0
+    counts = np.where(seeding | will_empty, 0, counts)
+    last_levels[idx] = new
+    full_counts[idx] = np.where(new >= 90, counts + 1, 0)
 
-    return new
+    return {name: int(level) for name, level in zip(names, new)}
 
-def post_level(bin_color, level):
-    payload = {'level': level}
+def post_levels(levels):
+    """POST every due bin in one request ({'yellow': 42, ...}); one server-side commit per tick."""
     try:
-        r = requests.post(f"{API_BASE}/{bin_color}", json=payload, timeout=6)
+        r = SESSION.post(API_BASE_BATCH, json=levels, timeout=6)
         return True, r.status_code, r.text
     except Exception as e:
         return False, None, str(e)
 
 def fetch_config():
-    global _paused
+    global _paused, _config_etag
+    headers = {'If-None-Match': _config_etag} if _config_etag else {}
     try:
-        r = requests.get(CONFIG_URL, timeout=3)
+        r = SESSION.get(CONFIG_URL, headers=headers, timeout=3)
+        if r.status_code == 304:
+            return  # unchanged since last poll
         j = r.json()
         _paused = bool(j.get('simulator_paused', False))
+        _config_etag = r.headers.get('ETag')
     except Exception:
         # keep previous paused state on error
         pass
@@ -118,6 +117,10 @@ def run_forever():
     print("Simulator started — stochastic model. Polling /config every", CONFIG_POLL_INTERVAL, "s")
     print("Intervals:", {k: v['interval'] for k, v in bins.items()}, file=sys.stderr)
 
+    # min-heap of (next_update, name): the loop sleeps until exactly the next event
+    schedule = [(info['next_update'], name) for name, info in bins.items()]
+    heapq.heapify(schedule)
+
     while True:
         now = time.time()
         if now - _last_config_check >= CONFIG_POLL_INTERVAL:
@@ -129,16 +132,24 @@ def run_forever():
             time.sleep(CONFIG_POLL_INTERVAL)
             continue
 
-        for name, info in bins.items():
-            if now >= info['next_update']:
-                lvl = generate_next_level(name)
-                ok, code, text = post_level(name, lvl)
+        due_names = []
+        while schedule[0][0] <= now:
+            name = schedule[0][1]
+            due_names.append(name)
+            bins[name]['next_update'] = now + bins[name]['interval']
+            heapq.heapreplace(schedule, (bins[name]['next_update'], name))
+        if due_names:
+            due = generate_next_levels(due_names)
+            ok, code, text = post_levels(due)
+            for name, lvl in due.items():
                 if ok:
                     print(f"[{name.upper()}] Level {lvl}% -> {code}")
                 else:
                     print(f"[{name.upper()}] POST failed: {text}", file=sys.stderr)
-                info['next_update'] = now + info['interval']
-        time.sleep(1)
+
+        # sleep until the next bin is due or the next /config poll, whichever comes first
+        wake_at = min(schedule[0][0], _last_config_check + CONFIG_POLL_INTERVAL)
+        time.sleep(max(0.0, wake_at - time.time()))
 
 if __name__ == "__main__":
     try: